@@ -1,24 +1,56 @@
 import boto3
+import time
+from botocore.config import Config
+from concurrent.futures import ThreadPoolExecutor
+
+SCAN_SEGMENTS = 8
+BATCH_WRITE_LIMIT = 25 # Max requests per BatchWriteItem call
+MAX_WORKERS = 32
+
+def scan_segment(table, segment):
+    """Returns the keys of every item in one parallel Scan segment"""
+    keys = []
+    scan_args = {
+        'Segment': segment,
+        'TotalSegments': SCAN_SEGMENTS,
+        'ProjectionExpression': 'session_id, #t',
+        'ExpressionAttributeNames': {'#t': 'timestamp'},
+    }
+    while True:
+        response = table.scan(**scan_args)
+        keys.extend(response.get('Items', []))
+        last_evaluated_key = response.get('LastEvaluatedKey')
+        if not last_evaluated_key:
+            return keys
+        scan_args['ExclusiveStartKey'] = last_evaluated_key
+
+def batch_delete(table, keys):
+    """Deletes up to BATCH_WRITE_LIMIT keys, retrying any unprocessed items"""
+    request_items = {table.name: [{'DeleteRequest': {'Key': key}} for key in keys]}
+    attempt = 0
+    while request_items:
+        if attempt:
+            time.sleep(min(0.05 * 2 ** attempt, 1.0))
+        response = table.meta.client.batch_write_item(RequestItems=request_items)
+        request_items = response.get('UnprocessedItems')
+        attempt += 1
 
 def wipe_table():
-    dynamodb = boto3.resource('dynamodb')
+    config = Config(max_pool_connections=MAX_WORKERS, retries={'mode': 'adaptive', 'max_attempts': 10})
+    dynamodb = boto3.resource('dynamodb', config=config)
     table = dynamodb.Table('mcp-sessions')
-    
-    print("Scanning table...")
-    response = table.scan()
-    items = response.get('Items', [])
-    
-    print(f"Found {len(items)} items. Deleting...")
-    
-    with table.batch_writer() as batch:
-        for item in items:
-            batch.delete_item(
-                Key={
-                    'session_id': item['session_id'],
-                    'timestamp': item['timestamp']
-                }
-            )
-            
+
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        print(f"Scanning table in {SCAN_SEGMENTS} segments...")
+        items = []
+        for keys in executor.map(lambda segment: scan_segment(table, segment), range(SCAN_SEGMENTS)):
+            items.extend(keys)
+
+        print(f"Found {len(items)} items. Deleting...")
+
+        chunks = [items[i:i + BATCH_WRITE_LIMIT] for i in range(0, len(items), BATCH_WRITE_LIMIT)]
+        list(executor.map(lambda chunk: batch_delete(table, chunk), chunks))
+
     print("Table wiped.")
 
 if __name__ == "__main__":
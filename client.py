@@ -2,28 +2,17 @@ import asyncio
 from mcp import ClientSession
 from mcp.client.sse import sse_client
 
-from uuid import uuid4
-import sys
-import os
-from dotenv import load_dotenv
-
-load_dotenv()
+from client_config import get_base_url, get_session_id, get_sse_url
 
 async def run():
     # The Lambda Function URL provided
-    lambda_url = os.getenv("LAMBDA_URL")
-    if not lambda_url:
+    if not get_base_url():
         print("Error: LAMBDA_URL not set in .env")
         return
         
-    # Ensure URL ends with /sse
-    base_url = f"{lambda_url.rstrip('/')}/sse"
-    if len(sys.argv) > 1:
-        session_id = sys.argv[1]
-    else:
-        session_id = uuid4().hex
+    session_id = get_session_id()
     print(f"Session ID: {session_id}")
-    url = f"{base_url}?session_id={session_id}"
+    url = get_sse_url(session_id)
     
     print(f"Connecting to {url}...")
     
@@ -54,4 +43,9 @@ async def run():
         print(f"Error: {e}")
 
 if __name__ == "__main__":
-    asyncio.run(run())
+    try:
+        import uvloop
+    except ImportError: # Not available on Windows
+        asyncio.run(run())
+    else:
+        uvloop.run(run())
@@ -0,0 +1,26 @@
+import os
+import sys
+from functools import lru_cache
+from uuid import uuid4
+from dotenv import load_dotenv
+
+load_dotenv()
+
+@lru_cache(maxsize=1)
+def get_base_url() -> str | None:
+    """SSE endpoint derived from LAMBDA_URL, or None if it isn't set"""
+    lambda_url = os.getenv("LAMBDA_URL")
+    if not lambda_url:
+        return None
+    # Ensure URL ends with /sse
+    return f"{lambda_url.rstrip('/')}/sse"
+
+@lru_cache(maxsize=128)
+def get_sse_url(session_id: str) -> str:
+    return f"{get_base_url()}?session_id={session_id}"
+
+def get_session_id() -> str:
+    """Session id passed on the command line, or a new one"""
+    if len(sys.argv) > 1:
+        return sys.argv[1]
+    return uuid4().hex
@@ -1,7 +1,10 @@
 
 import asyncio
-import json
+import hashlib
 import logging
+import orjson
+import threading
+from collections import OrderedDict
 from typing import Any, Dict, List, Annotated
 from typing_extensions import TypedDict
 
@@ -16,7 +19,33 @@ from langgraph.graph import StateGraph, END
 from pydantic import BaseModel, create_model
 
 # --- MCP to LangChain Adapter ---
+
+def _tool_signature(tool: types.Tool) -> str:
+    """Stable key for a tool's name and input schema"""
+    payload = orjson.dumps({"n": tool.name, "s": tool.inputSchema}, option=orjson.OPT_SORT_KEYS)
+    return hashlib.sha256(payload).hexdigest()
+
+def _make_invoke(session: ClientSession, tool_name: str):
+    async def _invoke(
+        **kwargs: Any,
+    ) -> Any:
+        result = await session.call_tool(tool_name, arguments=kwargs)
+        if result.isError:
+             raise Exception(f"Tool call failed: {result}")
+        content = result.content
+        # Single text block is the common case, return it without building a new string
+        if len(content) == 1 and content[0].type == "text":
+            return content[0].text
+        # Combine text content
+        return "".join(c.text for c in content if c.type == "text")
+    return _invoke
+
 class McpLangChainAdapter:
+    # create_model() is expensive, so args schemas are shared across sessions (LRU)
+    _schema_cache: "OrderedDict[str, type[BaseModel]]" = OrderedDict()
+    _schema_cache_lock = threading.RLock()
+    _schema_cache_size = 128
+
     def __init__(self, session: ClientSession):
         self.session = session
 
@@ -27,16 +56,14 @@ class McpLangChainAdapter:
             langchain_tools.append(self._create_tool(tool))
         return langchain_tools
 
-    def _create_tool(self, tool: types.Tool) -> StructuredTool:
-        async def _invoke(
-            **kwargs: Any,
-        ) -> Any:
-            result = await self.session.call_tool(tool.name, arguments=kwargs)
-            if result.isError:
-                 raise Exception(f"Tool call failed: {result}")
-            # Combine text content
-            text = "".join([c.text for c in result.content if c.type == "text"])
-            return text
+    @classmethod
+    def _get_schema(cls, tool: types.Tool) -> type[BaseModel]:
+        key = _tool_signature(tool)
+        with cls._schema_cache_lock:
+            schema = cls._schema_cache.get(key)
+            if schema is not None:
+                cls._schema_cache.move_to_end(key)
+                return schema
 
         # Dynamically create Pydantic model for args_schema
         fields = {}
@@ -46,28 +73,90 @@ class McpLangChainAdapter:
                 # In production, map 'number'->float, 'string'->str, etc.
                 fields[field_name] = (Any, ...)
         
-        Schema = create_model(f"{tool.name}Schema", **fields)
+        schema = create_model(f"{tool.name}Schema", **fields)
+
+        with cls._schema_cache_lock:
+            cls._schema_cache[key] = schema
+            cls._schema_cache.move_to_end(key)
+            while len(cls._schema_cache) > cls._schema_cache_size:
+                cls._schema_cache.popitem(last=False)
+        return schema
 
+    def _create_tool(self, tool: types.Tool) -> StructuredTool:
         return StructuredTool.from_function(
             func=None,
-            coroutine=_invoke,
+            coroutine=_make_invoke(self.session, tool.name),
             name=tool.name,
             description=tool.description or "",
-            args_schema=Schema, 
+            args_schema=self._get_schema(tool), 
         )
 
+# --- Bound model cache ---
+
+class BindToolsCache:
+    """LRU cache of llm.bind_tools() results keyed by model and tool signatures.
+
+    bind_tools() rebuilds the tool schemas on every call, so a model bound once
+    per tool set is reused across workflow runs.
+    """
+
+    def __init__(self, max_size: int = 128):
+        self.max_size = max_size
+        self._cache: "OrderedDict[tuple, Any]" = OrderedDict()
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def _key(llm: Any, tools: List[StructuredTool], tool_choice: Any) -> tuple:
+        # Sort by name only: comparing the args dicts of same-named tools would raise
+        tool_specs = sorted(((t.name, t.args) for t in tools), key=lambda spec: spec[0])
+        signature = orjson.dumps(tool_specs, option=orjson.OPT_SORT_KEYS, default=str)
+        # tool_choice may be a dict (e.g. {"type": "function", ...}), so key on its serialized form
+        choice = orjson.dumps(tool_choice, option=orjson.OPT_SORT_KEYS, default=str)
+        # id(llm) is stable while cached: the bound model keeps a reference to llm
+        return (id(llm), hashlib.sha256(signature).hexdigest(), choice)
+
+    def get_bound(self, llm: Any, tools: List[StructuredTool], tool_choice: Any = None) -> Any:
+        key = self._key(llm, tools, tool_choice)
+        with self._lock:
+            bound = self._cache.get(key)
+            if bound is not None:
+                self._cache.move_to_end(key)
+                return bound
+
+        if tool_choice is None:
+            bound = llm.bind_tools(tools)
+        else:
+            bound = llm.bind_tools(tools, tool_choice=tool_choice)
+
+        with self._lock:
+            self._cache[key] = bound
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_size:
+                self._cache.popitem(last=False)
+        return bound
+
+_bind_tools_cache = BindToolsCache()
+
+def get_bound(llm: Any, tools: List[StructuredTool], tool_choice: Any = None) -> Any:
+    return _bind_tools_cache.get_bound(llm, tools, tool_choice)
+
 # --- LangGraph Workflow ---
 
 class AgentState(TypedDict):
     messages: Annotated[List[BaseMessage], "The messages in the conversation"]
 
-async def run_workflow(tools: List[StructuredTool]):
+async def run_workflow(tools: List[StructuredTool], llm: Any = None):
     tool_map = {t.name: t for t in tools}
+    # Bind once per workflow (cached across runs), never per agent step
+    bound_llm = get_bound(llm, tools) if llm is not None else None
 
-    # Node that simulates an LLM deciding to call the tool
+    # Node that asks the LLM, or simulates one deciding to call the tool
     def agent_node(state: AgentState):
         messages = state["messages"]
         last_message = messages[-1]
+
+        if bound_llm is not None:
+            return {"messages": [bound_llm.invoke(messages)]}
         
         tool_calls = []
 
@@ -108,21 +197,27 @@ async def run_workflow(tools: List[StructuredTool]):
         
         new_messages = []
         if isinstance(last_message, AIMessage) and last_message.tool_calls:
-            for tool_call in last_message.tool_calls:
-                tool_name = tool_call["name"]
-                tool_args = tool_call["args"]
-                tool_id = tool_call["id"]
-                
-                if tool_name in tool_map:
-                    print(f"ToolNode: Executing {tool_name} with {tool_args}")
-                    tool = tool_map[tool_name]
-                    # Execute tool
-                    res = await tool.ainvoke(tool_args)
-                    print(f"ToolNode: Result: {res}")
-                
+            # Independent tool calls run concurrently: one round trip instead of one per call
+            calls = [tc for tc in last_message.tool_calls if tc["name"] in tool_map]
+            for tool_call in calls:
+                print(f"ToolNode: Executing {tool_call['name']} with {tool_call['args']}")
+            results = await asyncio.gather(
+                *[tool_map[tc["name"]].ainvoke(tc["args"]) for tc in calls],
+                return_exceptions=True,
+            )
+
+            for tool_call, res in zip(calls, results):
+                if isinstance(res, BaseException):
+                    print(f"ToolNode: {tool_call['name']} failed: {res}")
                     new_messages.append(
-                        ToolMessage(content=str(res), tool_call_id=tool_id)
+                        ToolMessage(content=str(res), tool_call_id=tool_call["id"], status="error")
                     )
+                    continue
+
+                print(f"ToolNode: Result: {res}")
+                new_messages.append(
+                    ToolMessage(content=str(res), tool_call_id=tool_call["id"])
+                )
         
         return {"messages": new_messages}
 
@@ -153,25 +248,15 @@ async def run_workflow(tools: List[StructuredTool]):
 
 # --- Main Client ---
 
-from uuid import uuid4
-import sys
-import os
-from dotenv import load_dotenv
-
-load_dotenv()
+from client_config import get_base_url, get_session_id, get_sse_url
 
 async def main():
-    lambda_url = os.getenv("LAMBDA_URL")
-    if not lambda_url:
+    if not get_base_url():
         print("Error: LAMBDA_URL not set in .env")
         return
-    base_url = f"{lambda_url.rstrip('/')}/sse"
-    if len(sys.argv) > 1:
-        session_id = sys.argv[1]
-    else:
-        session_id = uuid4().hex
+    session_id = get_session_id()
     print(f"Session ID: {session_id}")
-    url = f"{base_url}?session_id={session_id}"
+    url = get_sse_url(session_id)
     print(f"Connecting to {url}...")
     
     try:
@@ -193,4 +278,9 @@ async def main():
         traceback.print_exc()
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    try:
+        import uvloop
+    except ImportError: # Not available on Windows
+        asyncio.run(main())
+    else:
+        uvloop.run(main())
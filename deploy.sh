@@ -105,6 +105,16 @@ if ! aws dynamodb describe-table --table-name $TABLE_NAME --region $REGION >/dev
     aws dynamodb wait table-exists --table-name $TABLE_NAME --region $REGION
 fi
 
+# Let DynamoDB expire leftover session messages (one-time setting)
+TTL_STATUS=$(aws dynamodb describe-time-to-live --table-name $TABLE_NAME --region $REGION --query 'TimeToLiveDescription.TimeToLiveStatus' --output text)
+if [ "$TTL_STATUS" != "ENABLED" ] && [ "$TTL_STATUS" != "ENABLING" ]; then
+    echo "Enabling TTL on $TABLE_NAME..."
+    aws dynamodb update-time-to-live \
+        --table-name $TABLE_NAME \
+        --time-to-live-specification Enabled=true,AttributeName=ttl \
+        --region $REGION >/dev/null
+fi
+
 # Attach DynamoDB permissions to the role
 echo "Attaching DynamoDB permissions..."
 aws iam put-role-policy --role-name $ROLE_NAME --policy-name DynamoDBAccess --policy-document '{
@@ -116,6 +126,7 @@ aws iam put-role-policy --role-name $ROLE_NAME --policy-name DynamoDBAccess --po
                 "dynamodb:PutItem",
                 "dynamodb:Query",
                 "dynamodb:DeleteItem",
+                "dynamodb:BatchWriteItem",
                 "dynamodb:GetItem"
             ],
             "Resource": "arn:aws:dynamodb:'$REGION':'$ACCOUNT_ID':table/'$TABLE_NAME'"
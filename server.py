@@ -1,4 +1,5 @@
 import asyncio
+from collections.abc import Awaitable, Callable
 from mcp.server import Server
 from mcp.server.sse import SseServerTransport
 from contextlib import asynccontextmanager
@@ -8,55 +9,77 @@ import mcp.types as types
 
 import uvicorn
 
+try:
+    import uvloop
+except ImportError: # Not available on Windows
+    uvloop = None
+
 # Initialize MCP Server
 print("Initializing MCP Server v2")
 mcp_server = Server("mcp-lambda")
 
-@mcp_server.list_tools()
-async def list_tools() -> list[types.Tool]:
-    return [
-        types.Tool(
-            name="add",
-            description="Add two numbers",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "a": {"type": "number"},
-                    "b": {"type": "number"},
-                },
-                "required": ["a", "b"],
+# Static tool definitions, validated once at import
+_TOOLS = [
+    types.Tool(
+        name="add",
+        description="Add two numbers",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "a": {"type": "number"},
+                "b": {"type": "number"},
             },
-        ),
-        types.Tool(
-            name="register_trace",
-            description="Register a trace from the client",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "trace": {"type": "string"},
-                },
-                "required": ["trace"],
+            "required": ["a", "b"],
+        },
+    ),
+    types.Tool(
+        name="register_trace",
+        description="Register a trace from the client",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "trace": {"type": "string"},
             },
-        )
-    ]
+            "required": ["trace"],
+        },
+    )
+]
+
+@mcp_server.list_tools()
+async def list_tools() -> list[types.Tool]:
+    return _TOOLS
+
+ToolResult = list[types.TextContent | types.ImageContent | types.EmbeddedResource]
+
+async def _add(arguments: dict) -> ToolResult:
+    a = arguments.get("a")
+    b = arguments.get("b")
+    result = a + b
+    return [types.TextContent(type="text", text=str(result))]
+
+async def _register_trace(arguments: dict) -> ToolResult:
+    trace = arguments.get("trace")
+    print(f"DEBUG: Received trace: {trace}")
+    return [types.TextContent(type="text", text=f"Trace registered: {trace}")]
+
+_HANDLERS: dict[str, Callable[[dict], Awaitable[ToolResult]]] = {
+    "add": _add,
+    "register_trace": _register_trace,
+}
 
 @mcp_server.call_tool()
-async def call_tool(name: str, arguments: dict) -> list[types.TextContent | types.ImageContent | types.EmbeddedResource]:
-    if name == "add":
-        a = arguments.get("a")
-        b = arguments.get("b")
-        result = a + b
-        return [types.TextContent(type="text", text=str(result))]
-    elif name == "register_trace":
-        trace = arguments.get("trace")
-        print(f"DEBUG: Received trace: {trace}")
-        return [types.TextContent(type="text", text=f"Trace registered: {trace}")]
-    raise ValueError(f"Unknown tool: {name}")
+async def call_tool(name: str, arguments: dict) -> ToolResult:
+    handler = _HANDLERS.get(name)
+    if handler is None:
+        raise ValueError(f"Unknown tool: {name}")
+    return await handler(arguments)
 
 import os
-import boto3
+import msgpack
+from aiobotocore.config import AioConfig
+from aiobotocore.session import get_session
 import time
-import json
+import itertools
 from uuid import UUID, uuid4
 from urllib.parse import quote, parse_qs
 from mcp.server.sse import SseServerTransport
@@ -67,15 +90,61 @@ from mcp import types
 from starlette.requests import Request
 from pydantic import ValidationError
 import anyio
+from anyio.streams.memory import MemoryObjectSendStream
 from sse_starlette.sse import EventSourceResponse
 
-# SSE Transport handling
-sse_transport = None
-
 # DynamoDB Setup
-dynamodb = boto3.resource("dynamodb")
+# One session and connection pool per container, reused across Lambda invocations.
+# Pool sized for concurrent SSE sessions and BatchWriteItem fan-out, adaptive retries absorb throttling
+_session = get_session()
+_ddb_config = AioConfig(max_pool_connections=128, retries={"mode": "adaptive", "max_attempts": 10})
 table_name = os.environ.get("TABLE_NAME", "mcp-sessions")
-table = dynamodb.Table(table_name)
+# Low-level async client, driven by the event loop instead of the thread pool. Opened in lifespan().
+# Items use the wire format directly, built by hand for this fixed schema
+# (session_id: S, timestamp: N, message: B or S), skipping TypeSerializer/Decimal conversion
+ddb_client = None
+
+BATCH_WRITE_LIMIT = 25 # Max requests per BatchWriteItem call
+
+INACTIVITY_TIMEOUT = 10 # seconds
+
+MESSAGE_TTL = 3600 # seconds, items expire via the table's "ttl" attribute
+CLEANUP_TIMEOUT = 5 # seconds
+
+SSE_STREAM_BUFFER = 32 # Queued messages per in-process stream
+
+# Adaptive DynamoDB poll interval (seconds)
+POLL_INITIAL_DELAY = 0.05
+POLL_BUSY_DELAY = 0.01
+POLL_MAX_DELAY = 1.0
+
+# SSE sessions served by this instance, keyed by session_id.hex.
+# POSTs landing on the same instance are delivered straight into the session's inbox;
+# DynamoDB is only used when the POST landed on a different instance.
+_active_sessions: dict[str, MemoryObjectSendStream[SessionMessage]] = {}
+
+class _PollState:
+    """DynamoDB polling position and adaptive interval for one SSE session"""
+
+    def __init__(self):
+        self.cursor = 0 # Last DynamoDB timestamp delivered
+        self.delay = POLL_INITIAL_DELAY
+        self.next_poll = time.monotonic() # Due immediately
+        self.in_flight = False # A query for this session is running
+
+# Poll state of each active session, advanced by multiplex_poller
+_poll_states: dict[str, _PollState] = {}
+
+_timestamp_seq = itertools.count()
+
+def _next_timestamp() -> int:
+    """Integer microseconds (no float rounding) with a 4-bit in-process counter in the low bits,
+    so POSTs landing in the same microsecond on this instance still get distinct sort keys"""
+    return (time.time_ns() // 1000) * 16 + (next(_timestamp_seq) & 0xF)
+
+def _dump_message(message: JSONRPCMessage) -> str:
+    """Serializes an outbound message for the SSE data field (pydantic-core, no stdlib json)"""
+    return message.model_dump_json(by_alias=True, exclude_none=True)
 
 class DynamoDBSseTransport(SseServerTransport):
     async def handle_post_message(self, request):
@@ -92,16 +161,37 @@ class DynamoDBSseTransport(SseServerTransport):
         body = await request.body()
         try:
             # Validate it's a generic JSONRPC message first
-            message_json = json.loads(body)
+            try:
+                message = types.JSONRPCMessage.model_validate_json(body)
+            except ValidationError as e:
+                return Response(f"Invalid JSON-RPC message: {e}", status_code=400)
+
+            # Fast path: the SSE stream for this session is served by this instance
+            inbox = _active_sessions.get(session_id.hex)
+            if inbox is not None:
+                try:
+                    await inbox.send(SessionMessage(message))
+                    return Response("Accepted", status_code=202)
+                except (anyio.ClosedResourceError, anyio.BrokenResourceError):
+                    # Session is shutting down, fall back to DynamoDB
+                    pass
+
+            # msgpack is smaller than JSON text (less item size / RCU) and faster to decode
+            try:
+                stored_message = {"B": msgpack.packb(message.model_dump(mode="json", by_alias=True, exclude_none=True), use_bin_type=True)}
+            except OverflowError:
+                # Integers beyond 64 bits don't fit msgpack, keep those as JSON text
+                stored_message = {"S": body.decode("utf-8")}
+
             # Store in DynamoDB
             item = {
-                "session_id": str(session_id),
-                "timestamp": int(time.time() * 1000000), # Microseconds for ordering
-                "message": json.dumps(message_json)
+                "session_id": {"S": str(session_id)},
+                "timestamp": {"N": str(_next_timestamp())}, # Sort key for ordering
+                "message": stored_message,
+                # DynamoDB expires items left behind by sessions that never cleaned up
+                "ttl": {"N": str(int(time.time()) + MESSAGE_TTL)}
             }
-            # Use run_in_threadpool since boto3 is blocking
-            # Fix: Use lambda to pass args correctly to put_item
-            await anyio.to_thread.run_sync(lambda: table.put_item(Item=item))
+            await ddb_client.put_item(TableName=table_name, Item=item)
             
             return Response("Accepted", status_code=202)
             
@@ -111,8 +201,10 @@ class DynamoDBSseTransport(SseServerTransport):
 
     @asynccontextmanager
     async def connect_sse(self, scope, receive, send):
+        # Inbound stays unbuffered for back-pressure, the inbox already buffers deliveries
         read_stream_writer, read_stream = anyio.create_memory_object_stream(0)
-        write_stream, write_stream_reader = anyio.create_memory_object_stream(0)
+        # Outbound is buffered so the server can queue responses without a task switch per message
+        write_stream, write_stream_reader = anyio.create_memory_object_stream(SSE_STREAM_BUFFER)
         
         # Parse query string for session_id
         query_string = scope.get("query_string", b"").decode("utf-8")
@@ -135,63 +227,36 @@ class DynamoDBSseTransport(SseServerTransport):
         root_path = scope.get("root_path", "")
         full_endpoint = root_path.rstrip("/") + self._endpoint
         client_url = f"{quote(full_endpoint)}?session_id={session_id.hex}"
-
-        sse_writer, sse_reader = anyio.create_memory_object_stream(0)
-
-        async def poller_loop():
-            """Polls DynamoDB for new messages sent to this session"""
-            last_timestamp = 0
-            last_activity = time.time()
-            INACTIVITY_TIMEOUT = 10 # seconds
-
+        endpoint_event = {"event": "endpoint", "data": client_url}
+
+        sse_writer, sse_reader = anyio.create_memory_object_stream(SSE_STREAM_BUFFER)
+
+        # Both the POST fast path and multiplex_poller deliver into this inbox
+        inbox_writer, inbox_reader = anyio.create_memory_object_stream(SSE_STREAM_BUFFER)
+        last_activity = time.time()
+
+        async def inbox_loop():
+            """Forwards messages delivered to this session into the Server's read stream"""
+            nonlocal last_activity
+            async with inbox_reader:
+                async for session_message in inbox_reader:
+                    last_activity = time.time() # Update activity on new messages
+                    try:
+                        await read_stream_writer.send(session_message)
+                    except (anyio.ClosedResourceError, anyio.BrokenResourceError):
+                        return
+
+        async def inactivity_watchdog():
+            """Closes the session once no messages arrived for INACTIVITY_TIMEOUT seconds"""
             while True:
-                try:
-                    # Check for inactivity
-                    now = time.time()
-                    elapsed = now - last_activity
-                    # print(f"DEBUG: Session {session_id} polling. Elapsed: {elapsed:.2f}s") # excessive?
-
-                    if elapsed > INACTIVITY_TIMEOUT:
-                        print(f"DEBUG: Session {session_id} inactive for {INACTIVITY_TIMEOUT}s (Elapsed: {elapsed:.2f}). Closing.")
-                        try:
-                            # Perform cleanup directly here to ensure it runs
-                            print(f"DEBUG: Performing cleanup from poller for session {session_id}...")
-                            await anyio.to_thread.run_sync(lambda: cleanup_session(session_id))
-                            print(f"DEBUG: Cleanup successful.")
-                        except Exception as e:
-                            print(f"DEBUG: Cleanup failed in poller: {e}")
-                            
-                        tg.cancel_scope.cancel()
-                        break
-
-                    # Query for messages > last_timestamp
-                    response = await anyio.to_thread.run_sync(
-                        lambda: table.query(
-                            KeyConditionExpression=boto3.dynamodb.conditions.Key("session_id").eq(str(session_id)) & 
-                                                   boto3.dynamodb.conditions.Key("timestamp").gt(last_timestamp)
-                        )
-                    )
-                    items = response.get("Items", [])
-                    if items:
-                        last_activity = time.time() # Update activity on new messages
-                        
-                    for item in items:
-                        last_timestamp = max(last_timestamp, int(item["timestamp"]))
-                        msg_str = item["message"]
-                        try:
-                            # Use proper Pydantic model validation from strict types
-                            message = types.JSONRPCMessage.model_validate_json(msg_str)
-                            # Put into the read stream for the Server to consume
-                            await read_stream_writer.send(SessionMessage(message, metadata=None))
-                        except Exception as e:
-                            print(f"Failed to parse or send message from DB: {e}")
-
-                    # Cleanup old messages occasionally? (optional optimization)
-                    
-                except Exception as e:
-                    print(f"Poller error: {e}")
-                
-                await anyio.sleep(0.5) # Poll every 500ms
+                elapsed = time.time() - last_activity
+                if elapsed > INACTIVITY_TIMEOUT:
+                    print(f"DEBUG: Session {session_id} inactive for {INACTIVITY_TIMEOUT}s (Elapsed: {elapsed:.2f}). Closing.")
+                    # run_response's finally block does the best-effort cleanup
+                    tg.cancel_scope.cancel()
+                    return
+
+                await anyio.sleep(INACTIVITY_TIMEOUT - elapsed)
         
         # Remove monitor_disconnect as it might conflict or block
         # async def monitor_disconnect(): ... 
@@ -199,22 +264,25 @@ class DynamoDBSseTransport(SseServerTransport):
         async def output_sender():
             """Sends messages FROM the Server TO the Client via SSE"""
             async with sse_writer, write_stream_reader:
-                await sse_writer.send({"event": "endpoint", "data": client_url})
+                await sse_writer.send(endpoint_event)
                 
                 async for session_message in write_stream_reader:
                      # Update activity on outgoing messages too (optional, but good)
-                     # But we can't easily update local 'last_activity' variable in poller_loop scope unless it's a mutable or nonlocal
                      # For simplicity, reliance on incoming messages (POSTs) is sufficient for this "client verification" use case.
                      # If the server is sending data, the client is likely listening.
                      # However, to be safe, let's just rely on POSTs for "liveness" of interaction.
                     
                     await sse_writer.send({
                         "event": "message", 
-                        "data": session_message.message.model_dump_json(by_alias=True, exclude_none=True)
+                        "data": _dump_message(session_message.message)
                     })
 
+        _active_sessions[session_id.hex] = inbox_writer
+        _poll_states[session_id.hex] = _PollState()
+
         async with anyio.create_task_group() as tg:
-            tg.start_soon(poller_loop)
+            tg.start_soon(inbox_loop)
+            tg.start_soon(inactivity_watchdog)
             
             async def run_response():
                 try:
@@ -228,14 +296,16 @@ class DynamoDBSseTransport(SseServerTransport):
                         await read_stream_writer.aclose()
                         await write_stream_reader.aclose()
                         
-                        # Delete session items from DynamoDB
+                        # Delete session items from DynamoDB. Best effort: the TTL removes anything
+                        # left behind, so don't hold up shutdown on a slow cleanup.
                         print(f"DEBUG: Starting cleanup for session {session_id}...")
                         try:
-                            # Run synchronously to avoid async cancellation issues in finally
-                            # await anyio.to_thread.run_sync(lambda: cleanup_session(session_id))
-                            # Just calling the function via run_sync
-                            await anyio.to_thread.run_sync(lambda: cleanup_session(session_id))
-                            print(f"DEBUG: Session {session_id} cleaned up successfully.")
+                            with anyio.move_on_after(CLEANUP_TIMEOUT) as cleanup_scope:
+                                await cleanup_session(session_id)
+                            if cleanup_scope.cancelled_caught:
+                                print(f"DEBUG: Cleanup for session {session_id} timed out, leaving items to TTL.")
+                            else:
+                                print(f"DEBUG: Session {session_id} cleaned up successfully.")
                         except Exception as e:
                             print(f"DEBUG: Error cleaning up session: {e}")
                             import traceback
@@ -247,66 +317,185 @@ class DynamoDBSseTransport(SseServerTransport):
                 yield (read_stream, write_stream)
             finally:
                 print("DEBUG: connect_sse generator exiting, cancelling tg")
+                if _active_sessions.get(session_id.hex) is inbox_writer:
+                    del _active_sessions[session_id.hex]
+                    _poll_states.pop(session_id.hex, None)
+                await inbox_writer.aclose()
                 tg.cancel_scope.cancel()
 
-def cleanup_session(session_id):
+async def _query_session_keys(session_id):
+    """Returns the primary keys of all items for a given session_id"""
+    keys = []
+    last_evaluated_key = None
+    while True:
+        query_args = {
+            "TableName": table_name,
+            "KeyConditionExpression": "session_id = :s",
+            "ProjectionExpression": "session_id, #t",
+            "ExpressionAttributeNames": {"#t": "timestamp"},
+            "ExpressionAttributeValues": {":s": {"S": str(session_id)}},
+        }
+        if last_evaluated_key:
+            query_args["ExclusiveStartKey"] = last_evaluated_key
+            
+        response = await ddb_client.query(**query_args)
+        batch_items = response.get("Items", [])
+        keys.extend(batch_items)
+        print(f"DEBUG: Found {len(batch_items)} items to delete (Total: {len(keys)})")
+        
+        last_evaluated_key = response.get("LastEvaluatedKey")
+        if not last_evaluated_key:
+            return keys
+
+async def _batch_delete(keys):
+    """Deletes up to BATCH_WRITE_LIMIT keys, retrying any unprocessed items"""
+    request_items = {table_name: [{"DeleteRequest": {"Key": key}} for key in keys]}
+    attempt = 0
+    while request_items:
+        if attempt:
+            await anyio.sleep(min(0.05 * 2 ** attempt, 1.0))
+        response = await ddb_client.batch_write_item(RequestItems=request_items)
+        request_items = response.get("UnprocessedItems")
+        attempt += 1
+
+async def cleanup_session(session_id):
     """Deletes all items for a given session_id"""
     print(f"DEBUG: cleanup_session helper called for {session_id}")
     try:
         # Query all items for the session
-        items = []
-        last_evaluated_key = None
-        while True:
-            query_args = {
-                "KeyConditionExpression": boto3.dynamodb.conditions.Key("session_id").eq(str(session_id))
-            }
-            if last_evaluated_key:
-                query_args["ExclusiveStartKey"] = last_evaluated_key
-                
-            response = table.query(**query_args)
-            batch_items = response.get("Items", [])
-            items.extend(batch_items)
-            print(f"DEBUG: Found {len(batch_items)} items to delete (Total: {len(items)})")
-            
-            last_evaluated_key = response.get("LastEvaluatedKey")
-            if not last_evaluated_key:
-                break
+        keys = await _query_session_keys(session_id)
         
-        if not items:
+        if not keys:
             print("DEBUG: No items to delete.")
             return
 
-        # Batch delete
-        with table.batch_writer() as batch:
-            for item in items:
-                batch.delete_item(
-                    Key={
-                        "session_id": item["session_id"],
-                        "timestamp": item["timestamp"]
-                    }
-                )
+        # Issue the BatchWriteItem calls concurrently to hide the DynamoDB round trips
+        chunks = [keys[i:i + BATCH_WRITE_LIMIT] for i in range(0, len(keys), BATCH_WRITE_LIMIT)]
+        await asyncio.gather(*[_batch_delete(chunk) for chunk in chunks])
         print("DEBUG: Batch delete complete.")
     except Exception as e:
         print(f"DEBUG: Cleanup helper error: {e}")
         raise
 
+async def _poll_session(session_hex, state):
+    """Delivers DynamoDB messages newer than the session's cursor and schedules its next poll"""
+    try:
+        response = await ddb_client.query(
+            TableName=table_name,
+            KeyConditionExpression="session_id = :s AND #t > :t",
+            ExpressionAttributeNames={"#t": "timestamp"},
+            ExpressionAttributeValues={
+                ":s": {"S": str(UUID(hex=session_hex))},
+                ":t": {"N": str(state.cursor)},
+            },
+        )
+    except Exception as e:
+        print(f"Poller error for session {session_hex}: {e}")
+        state.delay = min(state.delay * 2, POLL_MAX_DELAY)
+        state.next_poll = time.monotonic() + state.delay
+        return
+
+    items = response.get("Items", [])
+    inbox_full = False
+
+    for item in items:
+        inbox = _active_sessions.get(session_hex)
+        if inbox is None: # Session closed while we were querying
+            return
+        timestamp = int(item["timestamp"]["N"])
+        attr = item["message"]
+        try:
+            # Use proper Pydantic model validation from strict types
+            if "B" in attr:
+                message = types.JSONRPCMessage.model_validate(msgpack.unpackb(attr["B"], raw=False))
+            else: # JSON text written before the msgpack encoding
+                message = types.JSONRPCMessage.model_validate_json(attr["S"])
+        except Exception as e:
+            print(f"Failed to parse message from DB: {e}")
+            state.cursor = max(state.cursor, timestamp) # Skip it, retrying won't help
+            continue
+
+        try:
+            # Never wait on a full inbox here, it would stall the tick for every session
+            inbox.send_nowait(SessionMessage(message, metadata=None))
+        except anyio.WouldBlock:
+            # Keep the cursor on this item, the next poll picks it up again
+            inbox_full = True
+            break
+        except (anyio.ClosedResourceError, anyio.BrokenResourceError):
+            return
+        state.cursor = max(state.cursor, timestamp)
+
+    # Drain quickly while messages keep arriving, back off while idle.
+    # A full inbox gets a short pause instead of re-querying every POLL_BUSY_DELAY.
+    if inbox_full:
+        state.delay = POLL_INITIAL_DELAY
+    elif items:
+        state.delay = POLL_BUSY_DELAY
+    else:
+        state.delay = min(state.delay * 2, POLL_MAX_DELAY)
+    state.next_poll = time.monotonic() + state.delay
+
+async def _run_poll(session_hex, state):
+    try:
+        await _poll_session(session_hex, state)
+    except Exception as e:
+        print(f"Poller error for session {session_hex}: {e}")
+    finally:
+        # Early returns leave next_poll in the past, don't re-query right away
+        now = time.monotonic()
+        if state.next_poll <= now:
+            state.next_poll = now + state.delay
+        state.in_flight = False
+
+async def multiplex_poller():
+    """Single background task scheduling DynamoDB polls for messages POSTed to other
+    instances, for every SSE session served by this instance. Each session keeps its
+    own adaptive interval and is polled in its own task, so a slow query for one
+    session never holds up the others."""
+    async with anyio.create_task_group() as tg:
+        while True:
+            now = time.monotonic()
+            for session_hex, state in list(_poll_states.items()):
+                if not state.in_flight and state.next_poll <= now:
+                    state.in_flight = True
+                    tg.start_soon(_run_poll, session_hex, state)
+
+            # Wake for the next due session, but at least every POLL_INITIAL_DELAY
+            # so newly registered sessions and finished polls are picked up promptly
+            next_poll = min(
+                (state.next_poll for state in _poll_states.values() if not state.in_flight),
+                default=float("inf"),
+            )
+            await anyio.sleep(max(0, min(next_poll - time.monotonic(), POLL_INITIAL_DELAY)))
+
 from starlette.datastructures import MutableHeaders
 from starlette.responses import Response
 
+# With the Lambda Web Adapter in response_stream mode chunks are flushed as they are written.
+# Otherwise send a comment chunk ahead of the first event to push past the proxy's flush threshold.
+if os.environ.get("AWS_LWA_INVOKE_MODE") == "response_stream":
+    _default_padding = 0
+else:
+    _default_padding = 4096
+SSE_FLUSH_PADDING = int(os.environ.get("SSE_FLUSH_PADDING", _default_padding))
+
 class MCPSSEResponse(Response):
     async def __call__(self, scope, receive, send):
+        padding_sent = SSE_FLUSH_PADDING == 0
+
         async def send_wrapper(message):
+            nonlocal padding_sent
             if message["type"] == "http.response.start":
                 headers = MutableHeaders(scope=message)
                 headers["X-Accel-Buffering"] = "no"
                 headers["Transfer-Encoding"] = "chunked"
                 headers["Content-Type"] = "text/event-stream"
-            elif message["type"] == "http.response.body":
-                 if not hasattr(self, 'padding_sent'):
-                     self.padding_sent = True
-                     # Inject 64KB padding comment to flush Lambda buffer
-                     padding = b": " + b" " * 65536 + b"\n\n"
-                     message["body"] = padding + message.get("body", b"")
+            elif message["type"] == "http.response.body" and not padding_sent:
+                padding_sent = True
+                # Separate chunk so the real payload isn't copied behind the padding
+                padding = b":" + b" " * SSE_FLUSH_PADDING + b"\n\n"
+                await send({"type": "http.response.body", "body": padding, "more_body": True})
             await send(message)
 
         async with sse_transport.connect_sse(scope, receive, send_wrapper) as streams:
@@ -314,19 +503,16 @@ class MCPSSEResponse(Response):
 
 
 
-# Replace the default transport with our Custom one
+# Replace the default transport with our Custom one.
+# A single instance serves every request: session state lives in DynamoDB and _active_sessions.
+sse_transport = DynamoDBSseTransport("/messages")
+
 async def handle_sse(request):
-    global sse_transport
-    # Use our custom transport
-    sse = DynamoDBSseTransport("/messages") 
-    sse_transport = sse # Although global variable is less relevant now as state is external
     return MCPSSEResponse()
 
 async def handle_messages(request):
-    # Instantiate transport directly for stateless execution (Lambda split-brain)
-    sse = DynamoDBSseTransport("/messages")
     # DynamoDBSseTransport.handle_post_message returns a Response object
-    return await sse.handle_post_message(request)
+    return await sse_transport.handle_post_message(request)
     # We don't verify return here as the transport handles "Accepted"
 
 
@@ -337,10 +523,23 @@ routes = [
     Route("/messages", handle_messages, methods=["POST"]),
 ]
 
-app = Starlette(debug=True, routes=routes)
+@asynccontextmanager
+async def lifespan(app):
+    global ddb_client
+    async with _session.create_client("dynamodb", config=_ddb_config) as client:
+        ddb_client = client
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(multiplex_poller)
+            yield
+            tg.cancel_scope.cancel()
+
+app = Starlette(debug=True, routes=routes, lifespan=lifespan)
 
 # Lambda Handler
 # handler = Mangum(app, lifespan="off")  # Unused with Web Adapter
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    if uvloop is not None:
+        uvicorn.run(app, host="0.0.0.0", port=8000, loop="uvloop", http="httptools")
+    else:
+        uvicorn.run(app, host="0.0.0.0", port=8000)